@@ -1,11 +1,19 @@
-from fastapi import FastAPI, Request, Form, BackgroundTasks
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, Request, Form
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field, ConfigDict
 import uvicorn
 import os
+import math
+import anyio
+import asyncio
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from mlProject.pipeline.prediction import PredictionPipeline
 from datetime import datetime
 from dotenv import load_dotenv
@@ -27,7 +35,102 @@ from evidently import Report
 from evidently.presets import DataDriftPreset
 
 # --- Standard App Setup ---
-app = FastAPI(title="Wine Quality Prediction API")
+# Concurrent /predict requests are collected into micro-batches so the
+# preprocessor and model are called once per batch instead of once per row
+MAX_BATCH = 64
+MAX_DELAY_MS = 5
+predict_queue = None
+
+# Built once per serving worker in lifespan, not at import, so a multi-worker
+# supervisor process never loads the model, recovers logs or starts a flusher
+prediction_pipeline = None
+
+async def batch_predict_worker(queue: asyncio.Queue):
+    """Drains up to MAX_BATCH queued rows, predicts them together and resolves each request's future"""
+    loop = asyncio.get_running_loop()
+    # One float64 buffer is reused for every batch instead of building an
+    # array per request and stacking them. Assigning the row tuples still goes
+    # through a temporary array, and the kernel allocates its output. The
+    # pipeline gets a view with its own dtype, so it makes no further copy,
+    # and it keeps no references, so reuse across batches is safe.
+    batch_buf = np.empty((MAX_BATCH, len(prediction_pipeline.cols)), dtype=np.float64)
+    while True:
+        items = [await queue.get()]
+        deadline = loop.time() + MAX_DELAY_MS / 1000
+        try:
+            while len(items) < MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Shut down mid-collection: fail the rows already taken off the queue
+            _fail_pending([fut for _, fut in items])
+            raise
+
+        rows, futures = zip(*items)
+        batch = batch_buf[:len(rows)]
+        try:
+            batch[:] = rows
+            predictions = prediction_pipeline.predict(batch)
+        except Exception as e:
+            for fut in futures:
+                if not fut.done():
+                    fut.set_exception(e)
+            continue
+
+        for fut, prediction in zip(futures, predictions):
+            if fut.done():
+                continue
+            # The pipeline marks rows it could not score as NaN, so one bad
+            # request fails on its own instead of taking the batch down
+            if math.isnan(prediction):
+                fut.set_exception(ValueError("Input X contains NaN, infinity or values too large to score."))
+            else:
+                fut.set_result(prediction)
+
+def _fail_pending(futures):
+    """Resolves prediction futures that will never be batched because the worker is stopping"""
+    for fut in futures:
+        if not fut.done():
+            fut.set_exception(RuntimeError("Server is shutting down"))
+
+async def batched_predict(data: tuple) -> float:
+    """Queues an 11-value feature row for the batch worker and waits for its prediction"""
+    fut = asyncio.get_running_loop().create_future()
+    await predict_queue.put((data, fut))
+    return float(await fut)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global predict_queue, prediction_pipeline, drift_executor, _drift_job
+    prediction_pipeline = await anyio.to_thread.run_sync(PredictionPipeline)
+    predict_queue = asyncio.Queue()
+    worker = asyncio.create_task(batch_predict_worker(predict_queue))
+    drift_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drift")
+    _drift_job = None
+    # Compile (or load) the numba kernel before the first request
+    prediction_pipeline.warmup()
+    # Warm the reference data cache so the first drift check skips the read
+    if os.path.exists(REFERENCE_PATH):
+        await anyio.to_thread.run_sync(load_reference_data)
+    yield
+    worker.cancel()
+    with suppress(asyncio.CancelledError):
+        await worker
+    # Requests still queued would otherwise wait forever
+    _fail_pending([predict_queue.get_nowait()[1] for _ in range(predict_queue.qsize())])
+    drift_executor.shutdown(wait=True)
+    # Drain buffered inference logs before the worker shuts down
+    prediction_pipeline.close()
+
+app = FastAPI(title="Wine Quality Prediction API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Compress larger responses (templated HTML, reports); pre-encoded responses pass through
+app.add_middleware(GZipMiddleware, minimum_size=500)
 
 # Initialize Prometheus Instrumentator to expose /metrics locally
 Instrumentator().instrument(app).expose(app)
@@ -81,33 +184,46 @@ class WineFeatures(BaseModel):
     sulphates: float = Field(..., json_schema_extra={"example": 0.56})
     alcohol: float = Field(..., json_schema_extra={"example": 9.4})
 
+REFERENCE_PATH = "artifacts/data_ingestion/data.parquet"
+
+# The drift preset is stateless between runs, so one Report serves every call
+_DRIFT_REPORT = Report(metrics=[DataDriftPreset()])
+
+# Drift jobs run one at a time on their own thread, so they neither block the
+# event loop nor take slots from the threadpool that serves other requests.
+# Created in lifespan, which also shuts it down.
+drift_executor = None
+_drift_job = None  # most recently submitted check
+
+@lru_cache(maxsize=1)
+def _read_reference_data(path: str, mtime_ns: int) -> pd.DataFrame:
+    return pq.read_table(path, columns=prediction_pipeline.cols).to_pandas()
+
+def load_reference_data() -> pd.DataFrame:
+    """Returns the training reference set, re-read only when retraining rewrites the file"""
+    return _read_reference_data(REFERENCE_PATH, os.stat(REFERENCE_PATH).st_mtime_ns)
+
 def calculate_drift():
-    """Background task to calculate data drift using Evidently AI"""
+    """Background task to read the data drift share from the online drift monitor"""
     try:
-        # 1. Load Reference Data (Training set)
-        reference_data = pd.read_csv("artifacts/data_ingestion/data.csv")
-        # Ensure columns match what we expect in prediction
-        reference_data = reference_data.drop('quality', axis=1)
-
-        # 2. Load Current Data (Inference Logs)
-        log_path = "artifacts/predictions/inference_log.csv"
-        if not os.path.exists(log_path):
+        # Pick up a new reference set after retraining, as /drift_report does
+        prediction_pipeline.refresh_drift_monitor()
+        monitor = prediction_pipeline.drift_monitor
+        if monitor is None:
+            print("Drift check skipped: No reference data found.")
+            return
+
+        # 1. Push buffered inference rows into the running statistics
+        prediction_pipeline.flush()
+
+        # 2. Compare the running distributions against the reference
+        result = monitor.summary()
+        if result['count'] == 0:
             print("Drift check skipped: No inference logs found yet.")
             return
-        
-        current_data = pd.read_csv(log_path)
-        # Drop non-feature columns
-        current_data = current_data.drop(['prediction', 'timestamp'], axis=1)
-
-        # 3. Run Evidently Drift Report
-        report = Report(metrics=[DataDriftPreset()])
-        snapshot = report.run(reference_data=reference_data, current_data=current_data)
-        
-        # 4. Extract drift score (share of drifted features)
-        result = snapshot.dict()
-        drift_share = result['metrics'][0]['value']['share']
-        
-        # 5. Update OpenTelemetry Gauge
+        drift_share = result['share']
+
+        # 3. Update OpenTelemetry Gauge
         if drift_gauge:
             drift_gauge.set(drift_share)
         print(f"Drift check completed. Drift Share: {drift_share}")
@@ -120,63 +236,71 @@ async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.get("/check_drift")
-async def check_drift(background_tasks: BackgroundTasks):
-    background_tasks.add_task(calculate_drift)
+async def check_drift():
+    global _drift_job
+    # A running check may have read its statistics before this trigger, so
+    # queue one follow-up behind it; triggers that arrive while that
+    # follow-up is still waiting to start are covered by it
+    if _drift_job is None or _drift_job.running() or _drift_job.done():
+        _drift_job = drift_executor.submit(calculate_drift)
     return {"message": "Drift calculation started in background"}
 
+def build_drift_report():
+    """Writes the Evidently drift report to disk and returns its path, or None without inference logs"""
+    reference_data = load_reference_data()
+
+    prediction_pipeline.flush(roll=True)
+    if not prediction_pipeline.has_logs():
+        return None
+
+    current_data = prediction_pipeline.read_log(columns=prediction_pipeline.cols).to_pandas()
+
+    # Generate the interactive report
+    snapshot = _DRIFT_REPORT.run(reference_data=reference_data, current_data=current_data)
+
+    report_path = "artifacts/predictions/drift_report.html"
+    snapshot.save_html(report_path)
+    return report_path
+
 @app.get("/drift_report")
 async def drift_report():
     """Generates and serves a full interactive Evidently AI drift report"""
     try:
-        reference_data = pd.read_csv("artifacts/data_ingestion/data.csv")
-        reference_data = reference_data.drop('quality', axis=1)
-
-        log_path = "artifacts/predictions/inference_log.csv"
-        if not os.path.exists(log_path):
+        # All the reads, the report run and save_html happen on the drift thread
+        report_path = await asyncio.get_running_loop().run_in_executor(drift_executor, build_drift_report)
+        if report_path is None:
             return HTMLResponse(content="<h1>No inference logs found yet. Run some predictions first!</h1>", status_code=404)
-        
-        current_data = pd.read_csv(log_path)
-        current_data = current_data.drop(['prediction', 'timestamp'], axis=1)
-
-        # Generate the interactive report
-        report = Report(metrics=[DataDriftPreset()])
-        snapshot = report.run(reference_data=reference_data, current_data=current_data)
-        
-        report_path = "artifacts/predictions/drift_report.html"
-        snapshot.save_html(report_path)
-        
+
         return FileResponse(report_path)
 
     except Exception as e:
         return HTMLResponse(content=f"<h1>Error generating report: {str(e)}</h1>", status_code=500)
 
 @app.get("/data_profiling")
-async def data_profiling():
-    """Serves the Sweetviz automated EDA report"""
+async def data_profiling(request: Request):
+    """Serves the Sweetviz automated EDA report, pre-gzipped when the client accepts it"""
     report_path = "artifacts/data_validation/report.html"
-    if os.path.exists(report_path):
-        return FileResponse(report_path)
+    headers = {"Cache-Control": "public, max-age=3600", "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", "") and await anyio.to_thread.run_sync(os.path.exists, report_path + ".gz"):
+        return FileResponse(report_path + ".gz", media_type="text/html", headers={**headers, "Content-Encoding": "gzip"})
+    if await anyio.to_thread.run_sync(os.path.exists, report_path):
+        return FileResponse(report_path, media_type="text/html", headers=headers)
     return HTMLResponse(content="<h1>Profiling report not found. Run the data validation pipeline first!</h1>", status_code=404)
 
-# --- Prediction Pipeline Initialization ---
-# Initialize the pipeline once at startup to avoid repeated disk reads
-prediction_pipeline = PredictionPipeline()
-
 @app.post("/predict")
 async def predict_api(features: WineFeatures):
     try:
-        data = [
+        data = (
             features.fixed_acidity, features.volatile_acidity, features.citric_acid,
             features.residual_sugar, features.chlorides, features.free_sulfur_dioxide,
             features.total_sulfur_dioxide, features.density, features.pH,
             features.sulphates, features.alcohol
-        ]
-        data = np.array(data).reshape(1, 11)
-        
-        # Use the global optimized pipeline
-        predict = prediction_pipeline.predict(data)
+        )
+
+        # Predicted together with other concurrent requests by the batch worker
+        prediction = await batched_predict(data)
 
-        return {"prediction": float(predict[0])}
+        return {"prediction": prediction}
     except Exception as e:
         return {"error": str(e)}
 
@@ -196,19 +320,20 @@ async def predict_web(
     alcohol: float = Form(...)
 ):
     try:
-        data = [
+        data = (
             fixed_acidity, volatile_acidity, citric_acid, residual_sugar,
             chlorides, free_sulfur_dioxide, total_sulfur_dioxide, density,
             pH, sulphates, alcohol
-        ]
-        data = np.array(data).reshape(1, 11)
-        
-        # Use the global optimized pipeline
-        predict = prediction_pipeline.predict(data)
+        )
+
+        # Predicted together with other concurrent requests by the batch worker
+        prediction = await batched_predict(data)
 
-        return templates.TemplateResponse("results.html", {"request": request, "prediction": float(predict[0])})
+        return templates.TemplateResponse("results.html", {"request": request, "prediction": prediction})
     except Exception as e:
         return HTMLResponse(content=f"Error: {str(e)}", status_code=500)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    # Multiple workers need the app as an import string; size with WEB_CONCURRENCY
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run("app:app" if workers > 1 else app, host="0.0.0.0", port=8080, workers=workers)
@@ -16,8 +16,8 @@ class WineQualityUser(HttpUser):
         We load the test data to pick random samples from it.
         """
         try:
-            self.test_data = pd.read_csv("artifacts/data_transformation/test.csv")
-            # The CSV has 'quality' column which we should not send to the predict API
+            self.test_data = pd.read_parquet("artifacts/data_transformation/test.parquet")
+            # The test set has 'quality' column which we should not send to the predict API
             self.features = self.test_data.drop('quality', axis=1)
         except Exception as e:
             print(f"Error loading test data: {e}")
@@ -1,8 +1,9 @@
 import os
 import urllib.request as request
 import zipfile
+import pyarrow.parquet as pq
 from mlProject import logger
-from mlProject.utils.common import get_size
+from mlProject.utils.common import get_size, read_csv
 from mlProject.entity import DataIngestionConfig
 from pathlib import Path
 
@@ -39,3 +40,13 @@ class DataIngestion:
             logger.info(f"Extracted zip file to: {unzip_path}")
         else:
             logger.info(f"File is not a zip file (extension: {self.config.local_data_file.suffix}). Skipping extraction.")
+
+
+    def convert_to_parquet(self):
+        """
+        Converts the raw CSV into a snappy-compressed Parquet file so downstream
+        stages can read only the columns they need.
+        """
+        table = read_csv(self.config.local_data_file, schema=self.config.all_schema)
+        pq.write_table(table, self.config.parquet_data_file, compression='snappy')
+        logger.info(f"Converted data to parquet at: {self.config.parquet_data_file} ({get_size(Path(self.config.parquet_data_file))})")
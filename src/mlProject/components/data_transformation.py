@@ -4,6 +4,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import PowerTransformer, StandardScaler
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from mlProject.entity import DataTransformationConfig
 from mlProject.utils.common import save_bin
 from pathlib import Path
@@ -13,7 +15,7 @@ class DataTransformation:
         self.config = config
 
     def train_test_spliting(self):
-        data = pd.read_csv(self.config.data_path)
+        data = pq.read_table(self.config.data_path).to_pandas()
 
         # Split the data into training and test sets. (0.8, 0.2) split as per research.
         train, test = train_test_split(data, test_size=0.2, random_state=42)
@@ -36,7 +38,7 @@ class DataTransformation:
         X_test_transformed = pt.transform(X_test)
         X_test_transformed = scaler.transform(X_test_transformed)
 
-        # Convert back to DataFrame to keep structure (optional but good for CSV)
+        # Convert back to DataFrame to keep structure (column names end up in the parquet schema)
         X_train_final = pd.DataFrame(X_train_transformed, columns=X_train.columns)
         X_test_final = pd.DataFrame(X_test_transformed, columns=X_test.columns)
 
@@ -45,8 +47,8 @@ class DataTransformation:
         test_final = pd.concat([X_test_final, y_test.reset_index(drop=True)], axis=1)
 
         # Save transformed data
-        train_final.to_csv(os.path.join(self.config.root_dir, "train.csv"), index=False)
-        test_final.to_csv(os.path.join(self.config.root_dir, "test.csv"), index=False)
+        pq.write_table(pa.Table.from_pandas(train_final, preserve_index=False), os.path.join(self.config.root_dir, "train.parquet"))
+        pq.write_table(pa.Table.from_pandas(test_final, preserve_index=False), os.path.join(self.config.root_dir, "test.parquet"))
 
         # Save the preprocessor (PowerTransformer + Scaler)
         # We can save them as a list or a pipeline
@@ -1,7 +1,10 @@
 import os
+import gzip
+import shutil
+from pyarrow import csv as pa_csv
 from mlProject import logger
 from mlProject.entity import DataValidationConfig
-import pandas as pd
+from mlProject.utils.common import read_csv
 import sweetviz as sv
 
 
@@ -13,23 +16,20 @@ class DataValidation:
     
     def validate_all_columns(self)-> bool:
         try:
-            validation_status = None
-
-            data = pd.read_csv(self.config.unzip_data_dir)
-            all_cols = list(data.columns)
+            # Only the header is needed, so open a streaming reader on a small first block
+            reader = pa_csv.open_csv(self.config.unzip_data_dir, read_options=pa_csv.ReadOptions(block_size=1 << 16))
+            all_cols = reader.schema.names
+            reader.close()
 
             all_schema = self.config.all_schema.keys()
 
-            
-            for col in all_cols:
-                if col not in all_schema:
-                    validation_status = False
-                    with open(self.config.STATUS_FILE, 'w') as f:
-                        f.write(f"Validation status: {validation_status}")
-                else:
-                    validation_status = True
-                    with open(self.config.STATUS_FILE, 'w') as f:
-                        f.write(f"Validation status: {validation_status}")
+            missing = set(all_cols) - set(all_schema)
+            validation_status = not missing
+            if missing:
+                logger.info(f"Columns not in schema: {sorted(missing)}")
+
+            with open(self.config.STATUS_FILE, 'w') as f:
+                f.write(f"Validation status: {validation_status}")
 
             return validation_status
         
@@ -38,9 +38,16 @@ class DataValidation:
         
     def generate_profiling_report(self):
         """
-        Generates an automated EDA report using sweetviz
+        Generates an automated EDA report using sweetviz, plus a gzipped copy
+        for the API to serve. Skipped when the report is newer than the data.
         """
         try:
+            report_file = self.config.REPORT_FILE
+            gzip_file = report_file.with_name(report_file.name + ".gz")
+            if gzip_file.exists() and os.path.getmtime(gzip_file) >= os.path.getmtime(self.config.unzip_data_dir):
+                logger.info(f"EDA report is up to date: {report_file}")
+                return
+
             logger.info("Generating automated EDA report...")
             
             # Monkey-patch numpy for sweetviz compatibility with newer numpy versions
@@ -48,10 +55,13 @@ class DataValidation:
             if not hasattr(np, 'VisibleDeprecationWarning'):
                 np.VisibleDeprecationWarning = type('VisibleDeprecationWarning', (DeprecationWarning,), {})
             
-            data = pd.read_csv(self.config.unzip_data_dir)
-            report = sv.analyze(data)
-            report.show_html(str(self.config.REPORT_FILE), open_browser=False)
-            logger.info(f"EDA report generated at: {self.config.REPORT_FILE}")
+            data = read_csv(self.config.unzip_data_dir, schema=self.config.all_schema).to_pandas()
+            report = sv.analyze(data, pairwise_analysis=self.config.pairwise_analysis)
+            report.show_html(str(report_file), open_browser=False)
+
+            with open(report_file, 'rb') as f_in, gzip.open(gzip_file, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            logger.info(f"EDA report generated at: {report_file}")
         except Exception as e:
             logger.error(f"Failed to generate EDA report: {e}")
             raise e
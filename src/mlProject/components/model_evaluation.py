@@ -1,5 +1,5 @@
 import os
-import pandas as pd
+import pyarrow.parquet as pq
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from mlProject.utils.common import save_json
 import numpy as np
@@ -24,7 +24,7 @@ class ModelEvaluation:
         return rmse, mae, r2
 
     def log_into_mlflow_and_wandb(self):
-        test_data = pd.read_csv(self.config.test_data_path)
+        test_data = pq.read_table(self.config.test_data_path).to_pandas()
         model = joblib.load(self.config.model_path)
 
         test_x = test_data.drop([self.config.target_column], axis=1)
@@ -35,6 +35,7 @@ class ModelEvaluation:
             dagshub.init(repo_owner='rfandan', repo_name='EtoE', mlflow=True)
             mlflow.set_registry_uri(self.config.mlflow_uri)
         
+        # Resolved once, after dagshub.init has set the tracking URI
         tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
 
         # 2. Initialize Weights & Biases
@@ -52,18 +53,12 @@ class ModelEvaluation:
             scores = {"rmse": rmse, "mae": mae, "r2": r2}
             save_json(path=Path(self.config.metric_file_name), data=scores)
 
-            # Log to MLflow
+            # Log to MLflow, all metrics in one logBatch request
             mlflow.log_params(self.config.all_params)
-            mlflow.log_metric("rmse", rmse)
-            mlflow.log_metric("r2", r2)
-            mlflow.log_metric("mae", mae)
+            mlflow.log_metrics(scores)
 
             # Log to W&B
-            wandb.log({
-                "rmse": rmse,
-                "r2": r2,
-                "mae": mae
-            })
+            wandb.log(scores)
 
             # Log Feature Importance (Coefficients) to W&B
             if hasattr(model, 'coef_'):
@@ -26,6 +26,7 @@ class ConfigurationManager:
     
     def get_data_ingestion_config(self) -> DataIngestionConfig:
         config = self.config.data_ingestion
+        schema = self.schema.COLUMNS
 
         create_directories([config.root_dir])
 
@@ -33,7 +34,9 @@ class ConfigurationManager:
             root_dir=Path(config.root_dir),
             source_URL=config.source_URL,
             local_data_file=Path(config.local_data_file),
-            unzip_dir=Path(config.unzip_dir) 
+            unzip_dir=Path(config.unzip_dir),
+            parquet_data_file=Path(config.parquet_data_file),
+            all_schema=schema
         )
 
         return data_ingestion_config
@@ -49,6 +52,7 @@ class ConfigurationManager:
             root_dir=Path(config.root_dir),
             STATUS_FILE=config.STATUS_FILE,
             REPORT_FILE=Path(config.REPORT_FILE),
+            pairwise_analysis=config.pairwise_analysis,
             unzip_data_dir = Path(config.unzip_data_dir),
             all_schema=schema,
         )
@@ -81,6 +85,7 @@ class ConfigurationManager:
             model_name = config.model_name,
             alpha = params.alpha,
             l1_ratio = params.l1_ratio,
+            do_cv = params.do_cv,
             target_column = schema
 
             
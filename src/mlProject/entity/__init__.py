@@ -8,6 +8,8 @@ class DataIngestionConfig:
     source_URL: str
     local_data_file: Path
     unzip_dir: Path
+    parquet_data_file: Path
+    all_schema: dict
 
 
 @dataclass(frozen=True)
@@ -15,6 +17,7 @@ class DataValidationConfig:
     root_dir: Path
     STATUS_FILE: str
     REPORT_FILE: Path
+    pairwise_analysis: str
     unzip_data_dir: Path
     all_schema: dict
 
@@ -33,6 +36,7 @@ class ModelTrainerConfig:
     model_name: str
     alpha: float
     l1_ratio: float
+    do_cv: bool
     target_column: str
 
 
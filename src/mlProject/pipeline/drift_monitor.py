@@ -0,0 +1,86 @@
+import numpy as np
+import threading
+
+
+class OnlineDriftMonitor:
+    """
+    Tracks inference feature distributions incrementally against the training
+    reference, so drift checks cost O(features x bins) instead of re-reading
+    the whole inference log.
+
+    Each feature is bucketed on the reference quantiles. The KS statistic is
+    then the largest gap between the reference and current CDFs at the bucket
+    edges, and a feature counts as drifted when it exceeds the two-sample KS
+    critical value at `alpha`.
+    """
+
+    def __init__(self, reference: np.ndarray, columns: list, n_bins: int = 100, alpha: float = 0.05):
+        reference = np.asarray(reference, dtype=np.float64)
+        self.columns = list(columns)
+        self.alpha = alpha
+
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        self.edges = np.quantile(reference, quantiles, axis=0).T
+        self.ref_count = len(reference)
+        self.ref_cdf = self._cdf(self._bin_counts(reference), self.ref_count)
+
+        # Running counts, plus Welford mean/M2 for each feature
+        self.count = 0
+        self.bin_counts = np.zeros((len(self.columns), n_bins), dtype=np.int64)
+        self.mean = np.zeros(len(self.columns))
+        self.m2 = np.zeros(len(self.columns))
+        self._lock = threading.Lock()
+
+    def _bin_counts(self, data: np.ndarray) -> np.ndarray:
+        n_bins = self.edges.shape[1] + 1
+        return np.stack([
+            np.bincount(np.searchsorted(self.edges[j], data[:, j]), minlength=n_bins)
+            for j in range(len(self.columns))
+        ])
+
+    @staticmethod
+    def _cdf(bin_counts: np.ndarray, count: int) -> np.ndarray:
+        # Fraction of samples <= each bucket edge
+        return np.cumsum(bin_counts, axis=1)[:, :-1] / count
+
+    def update(self, batch: np.ndarray):
+        """Adds a (n, n_features) batch of inference rows to the running statistics."""
+        batch = np.asarray(batch, dtype=np.float64)
+        if len(batch) == 0:
+            return
+
+        batch_count = len(batch)
+        batch_mean = batch.mean(axis=0)
+        batch_m2 = ((batch - batch_mean) ** 2).sum(axis=0)
+        batch_bins = self._bin_counts(batch)
+
+        with self._lock:
+            # Chan et al. parallel merge of the batch into the running mean/M2
+            total = self.count + batch_count
+            delta = batch_mean - self.mean
+            self.mean = self.mean + delta * batch_count / total
+            self.m2 = self.m2 + batch_m2 + delta ** 2 * self.count * batch_count / total
+            self.count = total
+            self.bin_counts = self.bin_counts + batch_bins
+
+    def summary(self) -> dict:
+        """Returns per-feature statistics and the share of drifted features."""
+        with self._lock:
+            count = self.count
+            bin_counts = self.bin_counts.copy()
+            mean = self.mean.copy()
+            m2 = self.m2.copy()
+
+        if count == 0:
+            return {"count": 0, "share": None, "features": {}}
+
+        ks = np.abs(self._cdf(bin_counts, count) - self.ref_cdf).max(axis=1)
+        critical = np.sqrt(-np.log(self.alpha / 2) / 2) * np.sqrt((count + self.ref_count) / (count * self.ref_count))
+        drifted = ks > critical
+        std = np.sqrt(m2 / (count - 1)) if count > 1 else np.zeros_like(m2)
+
+        features = {
+            col: {"mean": float(mean[j]), "std": float(std[j]), "ks": float(ks[j]), "drifted": bool(drifted[j])}
+            for j, col in enumerate(self.columns)
+        }
+        return {"count": count, "share": float(drifted.mean()), "features": features}
@@ -1,55 +1,335 @@
-import joblib 
+import joblib
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as ds
 from pathlib import Path
 import os
+import time
+import fcntl
+import atexit
+import threading
+import collections
+import contextlib
+from numba import njit
 from datetime import datetime
+from mlProject import logger
+from mlProject.pipeline.drift_monitor import OnlineDriftMonitor
+
+# All fast-math flags except nnan/ninf: the transform can overflow on large
+# finite inputs, and those results have to come out as inf, not garbage
+@njit(fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'}, cache=True)
+def yeo_johnson(X, lambdas):
+    """Yeo-Johnson transform with each column's lambda, matching PowerTransformer's branches."""
+    eps = np.spacing(1.0)  # the lambda tolerance PowerTransformer uses
+    n_rows, n_features = X.shape
+    out = np.empty_like(X)
+    for i in range(n_rows):
+        for j in range(n_features):
+            x = X[i, j]
+            lam = lambdas[j]
+            if x >= 0:
+                if abs(lam) > eps:
+                    out[i, j] = ((x + 1) ** lam - 1) / lam
+                else:
+                    out[i, j] = np.log1p(x)
+            else:
+                if abs(2 - lam) > eps:
+                    out[i, j] = -((1 - x) ** (2 - lam) - 1) / (2 - lam)
+                else:
+                    out[i, j] = -np.log1p(-x)
+    return out
 
 
 class PredictionPipeline:
-    def __init__(self):
-        self.model = joblib.load(Path('artifacts/model_trainer/model.joblib'))
-        self.preprocessor = joblib.load(Path('artifacts/data_transformation/preprocessor.joblib'))
-        
+    # Flushed rows are held in memory until a row group's worth is pending or
+    # SEGMENT_INTERVAL seconds have passed, then written as one complete
+    # segment file, which bounds what a crash can lose to that interval
+    ROW_GROUP_SIZE = 64 * 1024
+    SEGMENT_INTERVAL = 30.0
+    # Small timer-written segments are merged once this many accumulate
+    COMPACT_AFTER = 64
+
+    def __init__(self, flush_interval: float = 1.0, flush_batch_size: int = 8192):
+        # mmap_mode='r' maps any large stored arrays instead of copying them. The
+        # arrays here hold 11 values each, so it saves nothing measurable, and
+        # predict() uses the per-process folded copies built below anyway
+        self.model = joblib.load(Path('artifacts/model_trainer/model.joblib'), mmap_mode='r')
+        self.preprocessor = joblib.load(Path('artifacts/data_transformation/preprocessor.joblib'), mmap_mode='r')
+
+        # Everything after Yeo-Johnson is affine: PowerTransformer's own
+        # standardization, the StandardScaler and the linear model. Fold them
+        # into one weight vector and bias so predict() is yj(X) @ w + b.
+        # The sklearn objects stay loaded for retraining/evaluation parity.
+        pt = self.preprocessor.named_steps['transform']
+        scaler = self.preprocessor.named_steps['scaler']
+        self._lambdas = np.ascontiguousarray(pt.lambdas_, dtype=np.float64)
+
+        # PowerTransformer keeps its standardization in the private _scaler
+        # attribute (a StandardScaler, only set when standardize=True); there
+        # is no public accessor, so re-check this fold on sklearn upgrades
+        coef = np.asarray(self.model.coef_, dtype=np.float64)
+        mean, scale = np.zeros_like(coef), np.ones_like(coef)
+        for step in ([pt._scaler] if pt.standardize else []) + [scaler]:
+            step_mean = step.mean_ if step.with_mean else 0.0
+            step_scale = step.scale_ if step.with_std else 1.0
+            mean, scale = mean + step_mean * scale, scale * step_scale
+        self._w = np.ascontiguousarray(coef / scale)
+        self._b = np.float64(self.model.intercept_ - (mean * coef / scale).sum())
+
         # Define the column names as per the schema
         self.cols = [
             'fixed acidity', 'volatile acidity', 'citric acid', 'residual sugar',
             'chlorides', 'free sulfur dioxide', 'total sulfur dioxide', 'density',
             'pH', 'sulphates', 'alcohol'
         ]
-        
-        # Path for inference logging
-        self.log_path = Path("artifacts/predictions/inference_log.csv")
-        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self.log_schema = pa.schema(
+            [(col, pa.float64()) for col in self.cols]
+            + [('prediction', pa.float64()), ('timestamp', pa.string())]
+        )
+
+        # Inference logs are a directory of parquet segments. A segment is
+        # written under a "_" prefix, which readers skip, and renamed once
+        # complete. Leftovers from a crashed process are dealt with first.
+        self.log_path = Path("artifacts/predictions/inference_log")
+        os.makedirs(self.log_path, exist_ok=True)
+        self._recover_orphaned_segments()
+        self._pending = []
+        self._pending_since = None
+        # Every segment this process published, and the small ones awaiting compaction
+        self._segments = []
+        self._small_segments = []
+        self._small_rows = 0
+
+        # Online drift statistics over the rows this process has served since
+        # it started, updated by the flusher as rows are written and rebuilt
+        # by refresh_drift_monitor() when retraining rewrites the reference.
+        # Other workers' segments are left to read_log() and the full report.
+        self.reference_path = Path("artifacts/data_ingestion/data.parquet")
+        self._reference_mtime_ns = None
+        self.drift_monitor = self._init_drift_monitor()
+
+        # Inference rows are buffered in memory and written in batches by a
+        # background thread, so the request path never touches the disk. The
+        # thread wakes every flush_interval seconds, or early once
+        # flush_batch_size rows are pending.
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self._log_buf = collections.deque()
+        self._log_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name="inference-log-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
 
-    
     def predict(self, data):
-        # Convert input to DataFrame with correct column names
-        data_df = pd.DataFrame(data, columns=self.cols)
-        
-        # Transform the data using the saved preprocessor
-        transformed_data = self.preprocessor.transform(data_df)
-        
-        # Convert transformed data back to DataFrame to maintain feature names
-        transformed_df = pd.DataFrame(transformed_data, columns=self.cols)
-        
-        # Predict using the loaded model
-        prediction = self.model.predict(transformed_df)
+        """
+        Predicts an (n, 11) array in self.cols order. Rows with NaN or
+        infinite values, or finite values large enough to overflow the
+        transform, come back as NaN and are left out of the inference log.
+        """
+        # The kernel runs in float64 so any finite request value is scored as sklearn would score it
+        data = np.asarray(data, dtype=np.float64).reshape(-1, len(self.cols))
+        prediction = self._predict(data)
+        valid = np.isfinite(data).all(axis=1) & np.isfinite(prediction)
+        prediction[~valid] = np.nan
 
         # Log the inference
-        self._log_inference(data_df, prediction)
+        self._log_inference(data[valid], prediction[valid])
 
         return prediction
 
-    def _log_inference(self, input_df, prediction):
-        """Logs the input features and prediction to a CSV file with a timestamp."""
-        log_df = input_df.copy()
-        log_df['prediction'] = prediction
-        log_df['timestamp'] = datetime.now().strftime("%d %B %Y %H:%M:%S:")
-
-        
-        # Append to CSV if it exists, otherwise create it
-        if not os.path.isfile(self.log_path):
-            log_df.to_csv(self.log_path, index=False)
-        else:
-            log_df.to_csv(self.log_path, mode='a', header=False, index=False)
+    def _predict(self, data):
+        """Predicts a (n, 11) float64 ndarray without logging it."""
+        # Equivalent to model.predict(preprocessor.transform(data))
+        return yeo_johnson(data, self._lambdas) @ self._w + self._b
+
+    def _init_drift_monitor(self):
+        """Builds the drift monitor from the reference set and replays this process's logged and pending rows into it."""
+        if not os.path.exists(self.reference_path):
+            self._reference_mtime_ns = None
+            return None
+
+        self._reference_mtime_ns = os.stat(self.reference_path).st_mtime_ns
+        reference = pq.read_table(self.reference_path, columns=self.cols).to_pandas().to_numpy()
+        monitor = OnlineDriftMonitor(reference, self.cols)
+        if self._segments:
+            # Stream only the feature columns in fixed-size batches so memory
+            # stays flat however large the log has grown. Only this process
+            # compacts its own segments, under the write lock held here.
+            log = ds.dataset([str(path) for path in self._segments], format='parquet')
+            for batch in log.to_batches(columns=self.cols, batch_size=self.ROW_GROUP_SIZE):
+                monitor.update(np.column_stack([col.to_numpy() for col in batch.columns]))
+        if self._pending:
+            monitor.update(np.array([row[:len(self.cols)] for row in self._pending]))
+        return monitor
+
+    def refresh_drift_monitor(self):
+        """Rebuilds the drift monitor if the reference file changed since it was built."""
+        mtime_ns = os.stat(self.reference_path).st_mtime_ns if os.path.exists(self.reference_path) else None
+        if mtime_ns == self._reference_mtime_ns:
+            return
+
+        # Under the write lock no rows move between the pending list and disk mid-rebuild
+        with self._write_lock:
+            self.drift_monitor = self._init_drift_monitor()
+
+    def warmup(self):
+        """
+        Runs one unlogged prediction so the numba kernel is compiled (or loaded
+        from cache) before the first request rather than during it.
+        """
+        self._predict(np.zeros((1, len(self.cols))))
+
+    def has_logs(self) -> bool:
+        """Returns True once at least one complete log segment is on disk."""
+        return any(self.log_path.glob("part-*.parquet"))
+
+    def _log_inference(self, data, prediction):
+        """Queues the input features and prediction with a timestamp for the background flusher."""
+        # Raw epoch nanoseconds here; formatting happens per batch in flush()
+        timestamp = time.time_ns()
+        rows = [(*row, pred, timestamp) for row, pred in zip(data.tolist(), prediction.tolist())]
+
+        with self._log_lock:
+            self._log_buf.extend(rows)
+            pending = len(self._log_buf)
+
+        if pending >= self.flush_batch_size:
+            self._flush_event.set()
+
+    def _flush_loop(self):
+        """Drains the log buffer on each interval or batch-size wake-up until the pipeline is closed."""
+        while True:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            if self._stop_event.is_set():
+                return
+            self.flush()
+
+    def flush(self, roll: bool = False):
+        """
+        Moves buffered inference rows into the drift monitor and the pending
+        segment, and writes the segment once it holds ROW_GROUP_SIZE rows or
+        is SEGMENT_INTERVAL seconds old. With roll=True it is written
+        regardless, so every row is visible to readers of the log directory.
+        """
+        with self._log_lock:
+            rows = list(self._log_buf)
+            self._log_buf.clear()
+
+        with self._write_lock:
+            if rows:
+                if self.drift_monitor is not None:
+                    self.drift_monitor.update(np.array([row[:len(self.cols)] for row in rows]))
+                if not self._pending:
+                    self._pending_since = time.monotonic()
+                self._pending.extend(rows)
+
+            if self._pending and (
+                roll
+                or len(self._pending) >= self.ROW_GROUP_SIZE
+                or time.monotonic() - self._pending_since >= self.SEGMENT_INTERVAL
+            ):
+                self._write_pending()
+
+    def read_log(self, columns: list = None) -> pa.Table:
+        """Reads the complete log segments; call flush(roll=True) first to include buffered rows."""
+        # Compaction in this or another worker can't swap files mid-read
+        with self._write_lock, self._log_dir_lock(exclusive=False):
+            return pq.read_table(self.log_path, columns=columns)
+
+    @contextlib.contextmanager
+    def _log_dir_lock(self, exclusive: bool):
+        """
+        Holds an flock on the log directory, shared by every worker writing
+        to it. Compaction and orphan recovery replace files and take it
+        exclusively; read_log() takes it shared, so it never sees a merged
+        segment alongside the segments it replaces. Callers in this process
+        hold _write_lock or run before the flusher starts, so its own flocks
+        never contend.
+        """
+        # A "." prefix keeps parquet readers from treating it as a segment
+        with open(self.log_path / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    @staticmethod
+    def _format_timestamps(timestamps) -> list:
+        """Formats epoch nanoseconds as local time in the log's timestamp format."""
+        local_tz = datetime.now().astimezone().tzinfo
+        formatted = pd.to_datetime(np.array(timestamps), unit='ns', utc=True).tz_convert(local_tz)
+        return formatted.strftime("%d %B %Y %H:%M:%S:").tolist()
+
+    def _write_pending(self):
+        rows, self._pending = self._pending, []
+        columns = list(zip(*rows))
+        columns[-1] = self._format_timestamps(columns[-1])
+        arrays = [pa.array(col, type=field.type) for col, field in zip(columns, self.log_schema)]
+        path = self._write_segment(pa.Table.from_arrays(arrays, schema=self.log_schema))
+        self._segments.append(path)
+
+        if len(rows) < self.ROW_GROUP_SIZE:
+            self._small_segments.append(path)
+            self._small_rows += len(rows)
+            if self._small_rows >= self.ROW_GROUP_SIZE or len(self._small_segments) >= self.COMPACT_AFTER:
+                self._compact_segments()
+
+    def _write_segment(self, table: pa.Table) -> Path:
+        # pid keeps segment names unique when several workers share the directory
+        name = f"part-{os.getpid()}-{time.time_ns()}.parquet"
+        pq.write_table(table, self.log_path / f"_{name}", row_group_size=self.ROW_GROUP_SIZE, compression='snappy')
+        os.replace(self.log_path / f"_{name}", self.log_path / name)
+        return self.log_path / name
+
+    def _compact_segments(self):
+        """Merges this process's small segments into one file with full-size row groups."""
+        if len(self._small_segments) > 1:
+            merged = pa.concat_tables([pq.read_table(path) for path in self._small_segments])
+            with self._log_dir_lock(exclusive=True):
+                merged_path = self._write_segment(merged)
+                for path in self._small_segments:
+                    os.remove(path)
+            self._segments = [path for path in self._segments if path not in self._small_segments] + [merged_path]
+        self._small_segments = []
+        self._small_rows = 0
+
+    def _recover_orphaned_segments(self):
+        """Publishes complete "_part" files left by dead processes and removes truncated ones."""
+        # Exclusive, so workers starting together don't race over the same file
+        with self._log_dir_lock(exclusive=True):
+            for path in self.log_path.glob("_part-*.parquet"):
+                pid = int(path.name.split("-")[1])
+                try:
+                    os.kill(pid, 0)
+                    continue  # Still being written by a live worker
+                except ProcessLookupError:
+                    pass
+                except PermissionError:
+                    continue
+
+                try:
+                    pq.ParquetFile(path)
+                except Exception:
+                    logger.warning(f"Removing truncated inference log segment: {path}")
+                    os.remove(path)
+                else:
+                    logger.info(f"Recovered inference log segment: {path}")
+                    os.replace(path, self.log_path / path.name[1:])
+
+    def close(self):
+        """Stops the flusher thread, writes any pending rows and compacts this process's segments."""
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        self._flush_event.set()
+        self._flusher.join()
+        self.flush(roll=True)
+
+        with self._write_lock:
+            self._compact_segments()
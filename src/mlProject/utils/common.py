@@ -4,6 +4,9 @@ import yaml
 from mlProject import logger
 import json
 import joblib
+import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 from ensure import ensure_annotations
 from box import ConfigBox
 from pathlib import Path
@@ -107,3 +110,23 @@ def get_size(path: Path) -> str:
     """
     size_in_kb = round(os.path.getsize(path)/1024)
     return f"~ {size_in_kb} KB"
+
+
+def read_csv(path: Path, schema: dict = None) -> pa.Table:
+    """read csv file with pyarrow's multithreaded reader
+    Args:
+        path (Path): path to csv file
+        schema (dict, optional): column name to dtype mapping, pins column types
+            so the reader skips type inference. Defaults to None.
+    Returns:
+        pa.Table: parsed table, use .to_pandas() for a DataFrame
+    """
+    column_types = None
+    if schema is not None:
+        column_types = {col: pa.from_numpy_dtype(np.dtype(dtype)) for col, dtype in schema.items()}
+
+    return pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types),
+    )